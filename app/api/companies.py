@@ -2,7 +2,9 @@
 API routes for company analysis
 """
 
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from functools import partial
+from fastapi import APIRouter, HTTPException, Query, status
 from typing import List, Optional
 from ..models.schemas import (
     CompanyAnalysisRequest,
@@ -11,7 +13,7 @@ from ..models.schemas import (
     EngineeringChallenge,
     ErrorResponse
 )
-from ..services.company_service import CompanyAnalysisService
+from ..core.deps import get_company_service, get_project_service
 from ..services.website_parser import crawl_summarize_and_preview_tokens
 
 router = APIRouter()
@@ -20,6 +22,7 @@ router = APIRouter()
 @router.post(
     "/analyze-company",
     response_model=CompanyAnalysisResponse,
+    response_model_exclude_defaults=True,
     responses={
         400: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
@@ -38,32 +41,24 @@ async def analyze_company(
     """
     try:
         # Initialize services
-        from ..services.project_service import ProjectGenerationService
-        company_service = CompanyAnalysisService(request.api_key)
-        project_service = ProjectGenerationService(request.api_key)
+        company_service = get_company_service(request.api_key)
+        project_service = get_project_service(request.api_key)
         
-        # Analyze company
-        company_profile = await company_service.analyze_company(request.company_name, request.additional_info, request.website_url)
+        # Analyze company, its challenges and project ideas in a single Gemini call
+        company_profile, challenges, projects_data = await company_service.analyze_company_with_projects(
+            company_name=request.company_name,
+            total_ideas=request.total_ideas,
+            user_skills=request.user_skills,
+            additional_info=request.additional_info,
+            website_url=request.website_url
+        )
         if not company_profile:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to analyze company: {request.company_name}"
             )
         
-        # Get engineering challenges
-        challenges = await company_service.get_engineering_challenges(
-            request.company_name, 
-            company_profile
-        )
-        
-        # Generate project ideas
-        projects = await project_service.generate_projects_for_company(
-            company_name=request.company_name,
-            company_profile=company_profile,
-            challenges=challenges,
-            total_ideas=request.total_ideas,
-            user_skills=request.user_skills
-        )
+        projects = project_service.convert_project_ideas(projects_data, request.company_name)
         
         # Create response
         response = CompanyAnalysisResponse(
@@ -91,16 +86,24 @@ async def analyze_company(
 )
 async def preview_tokens(
     request: CompanyAnalysisRequest,
+    exact: bool = Query(False, description="Ask the Gemini API for the exact count instead of estimating it locally"),
 ):
     """
     Preview the summary and Gemini token count that would be sent to Gemini for company analysis.
     """
+    if not request.website_url:
+        return {"summary": None, "token_count": 0}
     try:
-        if not request.website_url:
-            return {"summary": None, "token_count": 0}
-        preview = crawl_summarize_and_preview_tokens(
-            start_url=request.website_url,
-            api_key=request.api_key
+        # Crawling and token counting block, so run them in a worker thread
+        loop = asyncio.get_running_loop()
+        preview = await loop.run_in_executor(
+            None,
+            partial(
+                crawl_summarize_and_preview_tokens,
+                start_url=request.website_url,
+                api_key=request.api_key,
+                exact=exact
+            )
         )
         return preview
     except Exception as e:
@@ -113,6 +116,7 @@ async def preview_tokens(
 @router.get(
     "/company-profile/{company_name}",
     response_model=CompanyProfile,
+    response_model_exclude_none=True,
     responses={
         400: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
@@ -128,7 +132,7 @@ async def get_company_profile(
     Get company profile information only
     """
     try:
-        company_service = CompanyAnalysisService(api_key)
+        company_service = get_company_service(api_key)
         company_profile = await company_service.analyze_company(company_name)
         
         if not company_profile:
@@ -148,6 +152,46 @@ async def get_company_profile(
         )
 
 
+@router.get(
+    "/company-profiles",
+    response_model=List[CompanyProfile],
+    response_model_exclude_none=True,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Get Company Profiles",
+    description="Get profile information for several companies at once"
+)
+async def get_company_profiles(
+    api_key: str,
+    company_names: List[str] = Query(..., max_length=10, description="Companies to analyze (at most 10)"),
+):
+    """
+    Get company profiles for several companies, analyzed in a single batch
+    """
+    try:
+        company_service = get_company_service(api_key)
+        profiles = await company_service.analyze_companies(company_names)
+        
+        failed = [name for name, profile in profiles.items() if not profile]
+        if failed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to analyze companies: {', '.join(failed)}"
+            )
+        
+        return list(profiles.values())
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 @router.get(
     "/engineering-challenges/{company_name}",
     response_model=List[EngineeringChallenge],
@@ -166,22 +210,19 @@ async def get_engineering_challenges(
     Get engineering challenges for a company
     """
     try:
-        company_service = CompanyAnalysisService(api_key)
+        company_service = get_company_service(api_key)
         
-        # First get company profile
-        company_profile = await company_service.analyze_company(company_name)
+        # Get the company profile and challenges concurrently; both share one Gemini analysis
+        company_profile, challenges = await asyncio.gather(
+            company_service.analyze_company(company_name),
+            company_service.get_engineering_challenges(company_name, None)
+        )
         if not company_profile:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to analyze company: {company_name}"
             )
         
-        # Get challenges
-        challenges = await company_service.get_engineering_challenges(
-            company_name, 
-            company_profile
-        )
-        
         return challenges
         
     except HTTPException:
@@ -211,7 +252,7 @@ async def get_company_insights(
     Get additional insights about a company
     """
     try:
-        company_service = CompanyAnalysisService(api_key)
+        company_service = get_company_service(api_key)
         insights = await company_service.get_company_insights(company_name)
         
         return insights
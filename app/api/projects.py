@@ -9,10 +9,11 @@ from ..models.schemas import (
     ProjectGenerationResponse,
     ProjectRefinementRequest,
     ProjectIdea,
+    EngineeringChallenge,
     ErrorResponse
 )
+from ..core.deps import get_company_service, get_project_service
 from ..services.project_service import ProjectGenerationService
-from ..services.company_service import CompanyAnalysisService
 
 router = APIRouter()
 
@@ -20,6 +21,7 @@ router = APIRouter()
 @router.post(
     "/generate-projects",
     response_model=ProjectGenerationResponse,
+    response_model_exclude_defaults=True,
     responses={
         400: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
@@ -35,8 +37,8 @@ async def generate_projects(
     """
     try:
         # Initialize services
-        company_service = CompanyAnalysisService(request.api_key)
-        project_service = ProjectGenerationService(request.api_key)
+        company_service = get_company_service(request.api_key)
+        project_service = get_project_service(request.api_key)
         
         # Get company profile first
         company_profile = await company_service.analyze_company(request.company_name)
@@ -47,10 +49,8 @@ async def generate_projects(
             )
         
         # Convert challenge strings to challenge objects
-        challenges = []
-        for i, challenge_desc in enumerate(request.challenges):
-            from ..models.schemas import EngineeringChallenge
-            challenge = EngineeringChallenge(
+        challenges = [
+            EngineeringChallenge(
                 id=f"challenge_{i}",
                 title=f"Challenge {i+1}",
                 description=challenge_desc,
@@ -58,7 +58,8 @@ async def generate_projects(
                 relevance_score=0.8,
                 tech_areas=[]
             )
-            challenges.append(challenge)
+            for i, challenge_desc in enumerate(request.challenges)
+        ]
         
         # Generate projects
         projects = await project_service.generate_projects_for_company(
@@ -104,8 +105,8 @@ async def refine_project(
     """
     try:
         # Initialize services
-        company_service = CompanyAnalysisService(request.api_key)
-        project_service = ProjectGenerationService(request.api_key)
+        company_service = get_company_service(request.api_key)
+        project_service = get_project_service(request.api_key)
         
         # Get company profile
         company_profile = await company_service.analyze_company(request.company_name)
@@ -116,7 +117,6 @@ async def refine_project(
             )
         
         # Create challenge object
-        from ..models.schemas import EngineeringChallenge
         challenge = EngineeringChallenge(
             id=request.project.challenge_id,
             title=request.project.challenge_title,
@@ -169,10 +169,8 @@ async def get_project_suggestions(
     Get project suggestions based on user preferences
     """
     try:
-        # For now, we'll use a dummy API key since this doesn't need AI
-        project_service = ProjectGenerationService("dummy")
-        
-        suggestions = await project_service.get_project_suggestions(
+        # Suggestions don't need AI, so no service (or Gemini model) is built for them
+        suggestions = await ProjectGenerationService.get_project_suggestions(
             user_skills=user_skills or [],
             preferred_difficulty=preferred_difficulty,
             max_duration=max_duration
@@ -207,7 +205,7 @@ async def generate_project_variations(
     Generate variations of an existing project idea
     """
     try:
-        project_service = ProjectGenerationService(api_key)
+        project_service = get_project_service(api_key)
         variations = await project_service.generate_project_variations(
             base_project=base_project,
             company_name="Unknown Company",
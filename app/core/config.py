@@ -31,8 +31,18 @@ class Settings(BaseSettings):
     # Database settings (for future use)
     DATABASE_URL: Optional[str] = None
     
+    # Gemini settings
+    GEMINI_MODEL: str = "gemini-2.5-flash-lite-preview-06-17"
+    MAX_CONCURRENT_LLM_CALLS: int = 8
+    GEMINI_MAX_RETRIES: int = 3
+    GEMINI_REQUESTS_PER_MINUTE: int = 60  # per API key, 0 disables client-side pacing
+    
     # Cache settings
     CACHE_TTL: int = 3600  # 1 hour
+    COMPANY_CACHE_TTL: int = 86400  # 24 hours, company profiles change slowly
+    CACHE_MAX_ENTRIES: int = 256
+    LLM_CACHE_TTL: int = 86400  # 24 hours, for generated and refined project ideas
+    LLM_CACHE_DIR: Optional[str] = None  # set to persist those responses on disk
     
     class Config:
         env_file = ".env"
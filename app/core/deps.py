@@ -2,8 +2,11 @@
 Dependencies for the FastAPI application
 """
 
+from functools import lru_cache
 from fastapi import HTTPException, status
 from ..core.config import settings
+from ..services.company_service import CompanyAnalysisService
+from ..services.project_service import ProjectGenerationService
 
 
 def get_current_user():
@@ -16,3 +19,19 @@ def get_current_user():
 
 # Note: API key validation is now handled directly in the request models
 # Users provide their API keys in the request body
+
+
+@lru_cache(maxsize=128)
+def get_company_service(api_key: str) -> CompanyAnalysisService:
+    """
+    Get the company analysis service for an API key, reused across requests
+    """
+    return CompanyAnalysisService(api_key)
+
+
+@lru_cache(maxsize=128)
+def get_project_service(api_key: str) -> ProjectGenerationService:
+    """
+    Get the project generation service for an API key, reused across requests
+    """
+    return ProjectGenerationService(api_key)
@@ -6,6 +6,7 @@ from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse
 import os
 
@@ -33,12 +34,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses and the SPA shell
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # Setup templates
 templates = Jinja2Templates(directory="app/templates")
 
+# The SPA shell doesn't depend on the request, so render it once at startup
+INDEX_HTML = templates.get_template("index.html").render()
+
 # Include API routes
 app.include_router(
     companies_router, 
@@ -55,7 +62,7 @@ app.include_router(
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Serve the main application page"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return HTMLResponse(INDEX_HTML)
 
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse)
@@ -88,4 +95,4 @@ async def catch_all(request: Request, path: str):
         raise HTTPException(status_code=404, detail="Not found")
     
     # For all other routes, serve the main app
-    return templates.TemplateResponse("index.html", {"request": request})
+    return HTMLResponse(INDEX_HTML)
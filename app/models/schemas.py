@@ -2,7 +2,7 @@
 Pydantic models for the FastAPI application
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -81,6 +81,18 @@ class ProjectIdea(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now, description="When idea was created")
 
 
+def normalize_skills(skills: Optional[List[str]]) -> Optional[List[str]]:
+    """Strip, de-duplicate (case-insensitively) and sort skills so equivalent inputs build identical prompts"""
+    if not skills:
+        return None
+    unique = {}
+    for skill in skills:
+        skill = skill.strip()
+        if skill:
+            unique.setdefault(skill.lower(), skill)
+    return [unique[key] for key in sorted(unique)] or None
+
+
 # Request Models
 class CompanyAnalysisRequest(BaseModel):
     """Request model for company analysis"""
@@ -92,6 +104,8 @@ class CompanyAnalysisRequest(BaseModel):
     additional_info: Optional[str] = Field(default=None, description="Additional information about the company, e.g. full website text.")
     website_url: Optional[str] = Field(default=None, description="Company website URL for automatic parsing.")
 
+    _normalize_user_skills = field_validator("user_skills")(normalize_skills)
+
 
 class ProjectGenerationRequest(BaseModel):
     """Request model for project generation"""
@@ -101,6 +115,8 @@ class ProjectGenerationRequest(BaseModel):
     ideas_per_challenge: int = Field(default=4, description="Number of ideas per challenge")
     user_skills: Optional[List[str]] = Field(default=None, description="User's skills")
 
+    _normalize_user_skills = field_validator("user_skills")(normalize_skills)
+
 
 class ProjectRefinementRequest(BaseModel):
     """Request model for project refinement"""
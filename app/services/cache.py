@@ -0,0 +1,69 @@
+"""
+In-process caching helpers shared by the services
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+_LEGAL_SUFFIX_RE = re.compile(r'\b(inc|llc|ltd|limited|corp|corporation|co|plc|gmbh)$')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_company_name(company_name: str) -> str:
+    """Reduce spelling variants such as "Google", " google inc. " to one cache key"""
+    name = _NON_WORD_RE.sub(' ', company_name.casefold())
+    name = _WHITESPACE_RE.sub(' ', name).strip()
+    return _LEGAL_SUFFIX_RE.sub('', name).strip() or name
+
+
+def api_key_digest(api_key: str) -> str:
+    """
+    Short digest of an API key for cache keys. Responses are cached per key, so a
+    cached result is only ever served to a caller whose key already produced it
+    """
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def canonicalize_prompt(prompt: str, company_name: str) -> str:
+    """
+    Reduce a prompt to the form used for cache keys: the company name in its normalized
+    form, case folded and with whitespace collapsed, so prompts differing only in those
+    respects share a cached response
+    """
+    prompt = prompt.replace(company_name, normalize_company_name(company_name))
+    return _WHITESPACE_RE.sub(' ', prompt.casefold()).strip()
+
+
+class TTLCache:
+    """Cache whose entries expire after `ttl` seconds, evicting the least recently used beyond `maxsize`"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key"""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
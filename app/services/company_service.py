@@ -3,16 +3,26 @@ Company analysis service for the FastAPI application
 """
 
 import asyncio
-import sys
-import os
-from typing import List, Optional
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
 
-# Add the project root to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from app.models.schemas import CompanyProfile, EngineeringChallenge, IndustryType, CompanySize, TechStack
+from ..models.schemas import CompanyProfile, EngineeringChallenge, IndustryType, CompanySize, TechStack
+from ..core.config import settings
+from .cache import TTLCache, api_key_digest, normalize_company_name
 from .gemini_service import GeminiService
-from app.services.website_parser import crawl_and_summarize_website
+from .website_parser import crawl_and_summarize_website
+
+# Enum members keyed by their value without separators, so "Scale-up", "scale up" and
+# "scaleup" all resolve with a dict lookup instead of a failed Enum() call
+_INDUSTRY_TYPES = {industry.value.replace('_', ''): industry for industry in IndustryType}
+_COMPANY_SIZES = {size.value.replace('_', ''): size for size in CompanySize}
+_ENUM_SEPARATORS_RE = re.compile(r'[\s_-]+')
+
+# Company profiles keyed by (API key digest, normalized name, additional info hash, website URL),
+# so follow-up requests skip both the website crawl and the Gemini call. Entries are per key:
+# a profile is never served to a caller whose key didn't pay for it
+_profile_cache = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=settings.COMPANY_CACHE_TTL)
 
 
 class CompanyAnalysisService:
@@ -26,47 +36,107 @@ class CompanyAnalysisService:
         """
         Analyze a company and return its profile
         """
+        cache_key = self._profile_cache_key(company_name, additional_info, website_url)
+        cached = _profile_cache.get(cache_key)
+        if cached:
+            return cached
+        
         try:
-            # If website_url is provided, crawl and summarize the website
-            if website_url:
-                website_summary = crawl_and_summarize_website(website_url)
-                if website_summary:
-                    if additional_info:
-                        additional_info = f"{additional_info}\n\nWebsite Summary:\n{website_summary}"
-                    else:
-                        additional_info = f"Website Summary:\n{website_summary}"
-            # Run the Gemini service in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            company_data = await loop.run_in_executor(
-                None, 
-                self.gemini_service.analyze_company, 
-                company_name
-            )
+            # The website summary feeds the prompt, so the crawl has to finish first
+            additional_info = await self._merge_website_summary_async(additional_info, website_url)
+            company_data = await self.gemini_service.analyze_company(company_name, additional_info)
             # Attach additional_info to the company_data if provided
             if additional_info:
                 company_data['additional_info'] = additional_info
             # Convert the raw data to CompanyProfile model
-            return self._convert_to_company_profile(company_data)
+            company_profile = self._convert_to_company_profile(company_data)
+            if not company_data.get('fallback'):
+                _profile_cache.set(cache_key, company_profile)
+            return company_profile
         except Exception as e:
             print(f"Error analyzing company {company_name}: {e}")
             return None
     
+    async def analyze_companies(self, company_names: List[str]) -> Dict[str, Optional[CompanyProfile]]:
+        """
+        Analyze several companies at once, keyed by the names as given
+        """
+        profiles = {}
+        missing = []
+        for company_name in company_names:
+            cached = _profile_cache.get(self._profile_cache_key(company_name, None, None))
+            if cached:
+                profiles[company_name] = cached
+            else:
+                missing.append(company_name)
+        
+        if missing:
+            # Companies without a cached profile share a single batched Gemini call
+            companies_data = await self.gemini_service.analyze_companies(missing)
+            for company_name, company_data in companies_data.items():
+                try:
+                    company_profile = self._convert_to_company_profile(company_data)
+                except Exception as e:
+                    print(f"Error analyzing company {company_name}: {e}")
+                    profiles[company_name] = None
+                    continue
+                if not company_data.get('fallback'):
+                    _profile_cache.set(self._profile_cache_key(company_name, None, None), company_profile)
+                profiles[company_name] = company_profile
+        
+        return {company_name: profiles[company_name] for company_name in company_names}
+    
+    async def analyze_company_with_projects(
+        self,
+        company_name: str,
+        total_ideas: int = 4,
+        user_skills: Optional[List[str]] = None,
+        additional_info: Optional[str] = None,
+        website_url: Optional[str] = None
+    ) -> Tuple[Optional[CompanyProfile], List[EngineeringChallenge], List[Dict[str, Any]]]:
+        """
+        Analyze a company and generate raw project ideas for it with a single Gemini call
+        """
+        original_info = additional_info
+        try:
+            # The website summary feeds the prompt, so the crawl has to finish first
+            additional_info = await self._merge_website_summary_async(additional_info, website_url)
+            company_data, projects_data = await self.gemini_service.analyze_company_with_projects(
+                company_name,
+                user_skills,
+                total_ideas,
+                additional_info
+            )
+            if additional_info:
+                company_data['additional_info'] = additional_info
+            company_profile = self._convert_to_company_profile(company_data)
+            if not company_data.get('fallback'):
+                _profile_cache.set(
+                    self._profile_cache_key(company_name, original_info, website_url),
+                    company_profile
+                )
+            challenges = company_data.get('engineering_challenges', [])
+            return (
+                company_profile,
+                [self._convert_to_engineering_challenge(challenge, i) for i, challenge in enumerate(challenges)],
+                projects_data
+            )
+        except Exception as e:
+            print(f"Error analyzing company {company_name}: {e}")
+            return None, [], []
+    
     async def get_engineering_challenges(
         self, 
         company_name: str, 
-        company_profile: CompanyProfile
+        company_profile: Optional[CompanyProfile],
+        company_data: Optional[dict] = None
     ) -> List[EngineeringChallenge]:
         """
-        Get engineering challenges for a company
+        Get engineering challenges for a company, reusing company_data when the caller already fetched it
         """
         try:
-            # Run the Gemini service in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            company_data = await loop.run_in_executor(
-                None, 
-                self.gemini_service.analyze_company, 
-                company_name
-            )
+            if company_data is None:
+                company_data = await self.gemini_service.analyze_company(company_name)
             
             # Extract challenges from the company data
             challenges = company_data.get('engineering_challenges', [])
@@ -82,19 +152,15 @@ class CompanyAnalysisService:
         """
         try:
             # This could be expanded to include more detailed analysis
-            company_profile = await self.analyze_company(company_name)
-            if not company_profile:
-                return {}
-            
-            challenges = await self.get_engineering_challenges(company_name, company_profile)
+            # One Gemini analysis feeds both the profile and the challenges
+            company_data = await self.gemini_service.analyze_company(company_name)
+            company_profile = self._convert_to_company_profile(company_data)
+            challenges = await self.get_engineering_challenges(company_name, company_profile, company_data)
             
             return {
                 "total_challenges": len(challenges),
                 "primary_tech_areas": company_profile.tech_stack.backend + company_profile.tech_stack.frontend,
-                "difficulty_distribution": {
-                    challenge.difficulty: len([c for c in challenges if c.difficulty == challenge.difficulty])
-                    for challenge in challenges
-                },
+                "difficulty_distribution": dict(Counter(challenge.difficulty for challenge in challenges)),
                 "industry_focus": company_profile.industry.value,
                 "company_size": company_profile.size.value
             }
@@ -102,6 +168,28 @@ class CompanyAnalysisService:
             print(f"Error getting company insights for {company_name}: {e}")
             return {}
     
+    def _profile_cache_key(self, company_name: str, additional_info: Optional[str], website_url: Optional[str]) -> tuple:
+        """Build the profile cache key from the inputs that shape a company profile"""
+        return (api_key_digest(self.api_key), normalize_company_name(company_name), hash(additional_info or ''), website_url or '')
+    
+    async def _merge_website_summary_async(self, additional_info: Optional[str], website_url: Optional[str]) -> Optional[str]:
+        """Run the blocking website crawl in a worker thread so it doesn't stall the event loop"""
+        if not website_url:
+            return additional_info
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._merge_website_summary, additional_info, website_url)
+    
+    def _merge_website_summary(self, additional_info: Optional[str], website_url: Optional[str]) -> Optional[str]:
+        """Crawl and summarize the company website, appending the summary to additional_info"""
+        if not website_url:
+            return additional_info
+        website_summary = crawl_and_summarize_website(website_url)
+        if not website_summary:
+            return additional_info
+        if additional_info:
+            return f"{additional_info}\n\nWebsite Summary:\n{website_summary}"
+        return f"Website Summary:\n{website_summary}"
+    
     def _convert_to_company_profile(self, data: dict) -> CompanyProfile:
         """Convert raw company data to CompanyProfile model"""
         tech_stack_data = data.get('tech_stack', {})
@@ -113,14 +201,18 @@ class CompanyAnalysisService:
         )
         return CompanyProfile(
             name=data.get('name', 'Unknown Company'),
-            industry=IndustryType(data.get('industry', 'technology')),
-            size=CompanySize(data.get('size', 'scaleup')),
+            industry=self._lookup_enum(_INDUSTRY_TYPES, data.get('industry', 'technology'), IndustryType.OTHER),
+            size=self._lookup_enum(_COMPANY_SIZES, data.get('size', 'scaleup'), CompanySize.UNKNOWN),
             description=data.get('description', ''),
             business_focus=data.get('business_focus', 'Technology innovation and digital transformation'),
             tech_stack=tech_stack,
             additional_info=data.get('additional_info', None)
         )
     
+    def _lookup_enum(self, members: dict, value: Any, default: Any) -> Any:
+        """Map a model-returned label onto an enum member, falling back to default for unknown labels"""
+        return members.get(_ENUM_SEPARATORS_RE.sub('', str(value).lower()), default)
+    
     def _convert_to_engineering_challenge(self, data: dict, index: int) -> EngineeringChallenge:
         """Convert raw challenge data to EngineeringChallenge model"""
         return EngineeringChallenge(
@@ -2,15 +2,200 @@
 Gemini API service for AI-powered features
 """
 
-import google.generativeai as genai
-from typing import List, Optional, Dict, Any
+import asyncio
+import copy
+import re
+import time
+from types import MappingProxyType
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as google_exceptions
+from typing import List, Optional, Dict, Any, Tuple
 import json
+import orjson
+from functools import lru_cache
+from ..core.config import settings
+from .cache import TTLCache, api_key_digest, normalize_company_name
+from .llm_cache import LLMCache
 from .prompts import (
     COMPANY_ANALYSIS_PROMPT,
+    COMPANIES_ANALYSIS_PROMPT,
+    COMPANY_PROJECTS_PROMPT,
     PROJECT_GENERATION_PROMPT,
     PROJECT_REFINEMENT_PROMPT
 )
 
+# Shared across all service instances so concurrent requests stay within Gemini's rate limits
+_request_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_request_semaphore() -> asyncio.Semaphore:
+    """Create the request semaphore lazily so it binds to the running event loop"""
+    global _request_semaphore
+    if _request_semaphore is None:
+        _request_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_LLM_CALLS)
+    return _request_semaphore
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: allows bursts of up to `capacity` requests
+    and refills at `rate` requests per second, sleeping only when it is empty
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+    
+    async def acquire(self) -> None:
+        """Wait until a request may be sent, then consume one token"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@lru_cache(maxsize=128)
+def _get_rate_limiter(api_key: str) -> TokenBucket:
+    """Gemini quotas are per API key, so each key gets its own bucket"""
+    requests_per_minute = settings.GEMINI_REQUESTS_PER_MINUTE
+    return TokenBucket(rate=requests_per_minute / 60, capacity=requests_per_minute)
+
+
+class GeminiModel:
+    """
+    A Gemini model bound to one API key. Requests go straight to the generative language
+    API client, so nothing depends on the SDK's process-wide configuration
+    """
+
+    def __init__(self, api_key: str, model_name: str):
+        self.model_name = model_name
+        self._client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+        # Every prompt asks for JSON, so have Gemini emit bare JSON rather than fenced markdown
+        self._generation_config = glm.GenerationConfig(response_mime_type="application/json")
+
+    async def generate_content_async(self, prompt: str) -> "GeminiResponse":
+        """Send a single-turn prompt and return the response"""
+        response = await self._client.generate_content(
+            glm.GenerateContentRequest(
+                model=f"models/{self.model_name}",
+                contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+                generation_config=self._generation_config
+            )
+        )
+        return GeminiResponse(response)
+
+
+class GeminiResponse:
+    """The parts of a generate_content response the service reads"""
+
+    def __init__(self, response: glm.GenerateContentResponse):
+        self.raw = response
+
+    @property
+    def text(self) -> str:
+        """Text of the first candidate; raises ValueError when the response has none (e.g. it was blocked)"""
+        if not self.raw.candidates:
+            raise ValueError(f"Gemini returned no candidates: {self.raw.prompt_feedback}")
+        return "".join(part.text for part in self.raw.candidates[0].content.parts)
+
+
+@lru_cache(maxsize=128)
+def _get_model(api_key: str, model_name: str) -> GeminiModel:
+    """
+    Build one GeminiModel per API key and model name and reuse it, so its
+    client and connection survive across requests instead of being rebuilt every time
+    """
+    return GeminiModel(api_key, model_name)
+
+
+# Company analyses keyed by (API key digest, normalized company name, hash of the additional context)
+_company_cache = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=settings.COMPANY_CACHE_TTL)
+
+# Most companies analyzed by a single batched prompt
+_COMPANIES_PER_BATCH = 5
+
+# In-flight company analyses, keyed like _company_cache
+_pending_analyses: Dict[tuple, "asyncio.Future[Dict[str, Any]]"] = {}
+
+# Parsed responses to the other prompts, keyed by a hash of the API key, model and canonical prompt
+_response_cache = LLMCache(
+    maxsize=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.LLM_CACHE_TTL,
+    directory=settings.LLM_CACHE_DIR
+)
+
+
+_json_decoder = json.JSONDecoder()
+_JSON_START_RE = re.compile(r'[\[{]')
+
+
+def _extract_json(text: str) -> Any:
+    """
+    Parse the first JSON value in a model response, ignoring markdown fences
+    and any prose before or after it
+    """
+    # Fast path: the models run in JSON mode, so responses are normally bare JSON
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    for match in _JSON_START_RE.finditer(text):
+        try:
+            value, _ = _json_decoder.raw_decode(text, match.start())
+            return value
+        except json.JSONDecodeError:
+            continue
+    raise json.JSONDecodeError("No JSON value found in response", text, 0)
+
+
+def _company_cache_key(api_key: str, company_name: str, additional_info: Optional[str] = None) -> tuple:
+    """The context is part of the prompt, so it is part of the key too"""
+    return (api_key_digest(api_key), normalize_company_name(company_name), hash(additional_info or ''))
+
+
+def _get_cached_company(api_key: str, company_name: str, additional_info: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Return a copy of a fresh cached company analysis, if there is one"""
+    cached = _company_cache.get(_company_cache_key(api_key, company_name, additional_info))
+    return copy.deepcopy(cached) if cached else None
+
+
+def _cache_company(api_key: str, company_name: str, company_data: Dict[str, Any], additional_info: Optional[str] = None) -> None:
+    """Store a copy of a company analysis"""
+    _company_cache.set(_company_cache_key(api_key, company_name, additional_info), copy.deepcopy(company_data))
+
+
+# Fallback project ideas, built once as read-only templates; callers get their own copies
+_DEFAULT_PROJECT_IDEAS = tuple(
+    MappingProxyType(project) for project in (
+        {
+            "title": "Real-time Analytics Dashboard",
+            "description": "Build a dashboard to visualize company metrics in real-time",
+            "difficulty": "intermediate",
+            "estimated_duration": "2-3 months",
+            "tech_stack": ("React", "Node.js", "WebSocket", "Chart.js"),
+            "demo_hook": "Demonstrate real-time data updates and interactive charts",
+            "challenge_id": "challenge_1",
+            "challenge_title": "Data Visualization"
+        },
+        {
+            "title": "API Gateway Service",
+            "description": "Create a centralized API gateway for microservices",
+            "difficulty": "advanced",
+            "estimated_duration": "3-4 months",
+            "tech_stack": ("Python", "FastAPI", "Redis", "Docker"),
+            "demo_hook": "Show API routing, rate limiting, and service discovery",
+            "challenge_id": "challenge_2",
+            "challenge_title": "System Architecture"
+        }
+    )
+)
+
 
 class GeminiService:
     """Service for interacting with Google's Gemini AI API"""
@@ -18,37 +203,64 @@ class GeminiService:
     def __init__(self, api_key: str):
         """Initialize the Gemini service with user-provided API key"""
         self.api_key = api_key
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-06-17')
+        self.model = _get_model(api_key, settings.GEMINI_MODEL)
     
-    def analyze_company(self, company_name: str) -> Dict[str, Any]:
+    async def _generate(self, prompt: str):
+        """
+        Send a prompt to Gemini, paced by the per-key token bucket, bounded by
+        the shared semaphore and retried with exponential backoff when the API
+        reports rate limiting (429)
         """
-        Analyze a company and return its profile
+        delay = 1.0
+        for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+            # Every attempt, retries included, is a request against the key's quota
+            if settings.GEMINI_REQUESTS_PER_MINUTE > 0:
+                await _get_rate_limiter(self.api_key).acquire()
+            try:
+                async with _get_request_semaphore():
+                    return await self.model.generate_content_async(prompt)
+            except google_exceptions.ResourceExhausted:
+                if attempt == settings.GEMINI_MAX_RETRIES:
+                    raise
+            # Back off outside the semaphore so a rate-limited key doesn't hold slots other keys could use
+            await asyncio.sleep(delay)
+            delay *= 2
+    
+    async def analyze_company(self, company_name: str, additional_info: Optional[str] = None) -> Dict[str, Any]:
         """
+        Analyze a company and return its profile, informed by additional_info when given
+        """
+        cached = _get_cached_company(self.api_key, company_name, additional_info)
+        if cached:
+            return cached
+        
+        # Concurrent callers asking for the same company share one in-flight Gemini call
+        key = _company_cache_key(self.api_key, company_name, additional_info)
+        task = _pending_analyses.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze_company(company_name, additional_info))
+            _pending_analyses[key] = task
+            task.add_done_callback(lambda _: _pending_analyses.pop(key, None))
+        # Shield so one cancelled caller doesn't cancel the call for the others
+        return copy.deepcopy(await asyncio.shield(task))
+    
+    async def _analyze_company(self, company_name: str, additional_info: Optional[str]) -> Dict[str, Any]:
+        """Run the Gemini analysis for a company that isn't cached"""
         try:
-            prompt = COMPANY_ANALYSIS_PROMPT.format(company_name=company_name)
-            
-            response = self.model.generate_content(prompt)
-            
-            # Try to extract JSON from the response
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
+            prompt = COMPANY_ANALYSIS_PROMPT.format(
+                company_name=company_name,
+                context_text=self._format_context(additional_info)
+            )
             
-            response_text = response_text.strip()
+            response = await self._generate(prompt)
             
             try:
-                result = json.loads(response_text)
+                result = _extract_json(response.text)
+                _cache_company(self.api_key, company_name, result, additional_info)
                 return result
             except json.JSONDecodeError as json_error:
                 print(f"JSON parsing error for {company_name}: {json_error}")
-                print(f"Raw response: {response_text}")
+                print(f"Raw response: {response.text}")
                 # Fall back to default profile
                 return self._get_default_company_profile(company_name)
             
@@ -56,7 +268,119 @@ class GeminiService:
             print(f"Error analyzing company {company_name}: {e}")
             return self._get_default_company_profile(company_name)
     
-    def generate_project_ideas(
+    async def analyze_companies(self, company_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze several companies with batched Gemini calls, keyed by the names as given
+        """
+        results = {}
+        missing = []
+        for company_name in dict.fromkeys(company_names):
+            cached = _get_cached_company(self.api_key, company_name)
+            if cached:
+                results[company_name] = cached
+            else:
+                missing.append(company_name)
+        
+        # Fixed-size batches keep each response well within the output limit
+        batches = [
+            missing[start:start + _COMPANIES_PER_BATCH]
+            for start in range(0, len(missing), _COMPANIES_PER_BATCH)
+        ]
+        for batch_results in await asyncio.gather(*(self._analyze_company_batch(batch) for batch in batches if len(batch) > 1)):
+            results.update(batch_results)
+        
+        # Anything a batch left out (or a single uncached name) is analyzed on its own
+        leftovers = [company_name for company_name in missing if company_name not in results]
+        if leftovers:
+            analyses = await asyncio.gather(*(self.analyze_company(company_name) for company_name in leftovers))
+            results.update(zip(leftovers, analyses))
+        
+        return {company_name: results[company_name] for company_name in company_names}
+    
+    async def _analyze_company_batch(self, company_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Analyze a batch of uncached companies with one Gemini call, leaving out any the response misses"""
+        results = {}
+        try:
+            prompt = COMPANIES_ANALYSIS_PROMPT.format(
+                company_names="\n".join(f"- {company_name}" for company_name in company_names)
+            )
+            
+            response = await self._generate(prompt)
+            
+            try:
+                result = _extract_json(response.text)
+                # The model may echo a name with different casing or punctuation
+                by_name = {normalize_company_name(name): data for name, data in result.items()}
+                for company_name in company_names:
+                    company_data = by_name.get(normalize_company_name(company_name))
+                    if isinstance(company_data, dict):
+                        _cache_company(self.api_key, company_name, company_data)
+                        results[company_name] = company_data
+            except (json.JSONDecodeError, AttributeError) as json_error:
+                print(f"JSON parsing error for companies {', '.join(company_names)}: {json_error}")
+                print(f"Raw response: {response.text}")
+            
+        except Exception as e:
+            print(f"Error analyzing companies {', '.join(company_names)}: {e}")
+        return results
+    
+    async def analyze_company_with_projects(
+        self,
+        company_name: str,
+        user_skills: Optional[List[str]] = None,
+        total_ideas: int = 4,
+        additional_info: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Analyze a company and generate project ideas for its challenges in a single call
+        """
+        cached = _get_cached_company(self.api_key, company_name, additional_info)
+        if cached:
+            # The profile is already known, so only the project ideas are left to generate
+            projects = await self.generate_project_ideas(
+                company_name,
+                cached.get('engineering_challenges', []),
+                user_skills,
+                total_ideas
+            )
+            return cached, projects
+        
+        try:
+            prompt = COMPANY_PROJECTS_PROMPT.format(
+                total_ideas=total_ideas,
+                company_name=company_name,
+                context_text=self._format_context(additional_info),
+                skills_text=self._format_skills(user_skills)
+            )
+            
+            response = await self._generate(prompt)
+            
+            try:
+                result = _extract_json(response.text)
+                company_data = result['company']
+                projects = self._attach_challenges(
+                    result.get('projects', []),
+                    company_data.get('engineering_challenges', [])
+                )
+                _cache_company(self.api_key, company_name, company_data, additional_info)
+                return company_data, projects
+            except (json.JSONDecodeError, KeyError, TypeError) as json_error:
+                print(f"JSON parsing error for {company_name}: {json_error}")
+                print(f"Raw response: {response.text}")
+                # Fall back to default profile and project ideas
+                return (
+                    self._get_default_company_profile(company_name),
+                    self._get_default_project_ideas(company_name, total_ideas)
+                )
+            
+        except Exception as e:
+            print(f"Error analyzing company {company_name}: {e}")
+            return (
+                self._get_default_company_profile(company_name),
+                self._get_default_project_ideas(company_name, total_ideas)
+            )
+    
+    async def generate_project_ideas(
         self, 
         company_name: str, 
         challenges: List[Dict[str, Any]], 
@@ -67,8 +391,8 @@ class GeminiService:
         Generate project ideas based on company challenges
         """
         try:
-            skills_text = f"User skills: {', '.join(user_skills or [])}" if user_skills else "No specific skills mentioned"
-            challenges_text = "\n".join([f"- {c['title']}: {c['description']}" for c in challenges])
+            skills_text = self._format_skills(user_skills)
+            challenges_text = "\n".join([f"[{i}] {c['title']}: {c['description']}" for i, c in enumerate(challenges, 1)])
             
             prompt = PROJECT_GENERATION_PROMPT.format(
                 total_ideas=total_ideas,
@@ -76,36 +400,35 @@ class GeminiService:
                 challenges_text=challenges_text,
                 skills_text=skills_text
             )
+            cache_key = LLMCache.cache_key(self.api_key, self.model.model_name, prompt, company_name)
+            cached = _response_cache.get(cache_key)
+            if cached:
+                return self._attach_challenges(cached, challenges)
             
-            response = self.model.generate_content(prompt)
-            
-            # Try to extract JSON from the response
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
+            response = await self._generate(prompt)
             
             try:
-                result = json.loads(response_text)
-                return result
+                result = _extract_json(response.text)
             except json.JSONDecodeError as json_error:
                 print(f"JSON parsing error for project ideas: {json_error}")
-                print(f"Raw response: {response_text}")
+                print(f"Raw response: {response.text}")
                 # Fall back to default project ideas
                 return self._get_default_project_ideas(company_name, total_ideas)
             
+            if not isinstance(result, list) or not all(isinstance(project, dict) for project in result):
+                print(f"Unexpected project ideas response: {response.text}")
+                return self._get_default_project_ideas(company_name, total_ideas)
+            
+            # Only a response that made it all the way through is cached
+            projects = self._attach_challenges(result, challenges)
+            _response_cache.set(cache_key, projects)
+            return projects
+            
         except Exception as e:
             print(f"Error generating project ideas: {e}")
             return self._get_default_project_ideas(company_name, total_ideas)
     
-    def refine_project_idea(
+    async def refine_project_idea(
         self, 
         project: Dict[str, Any], 
         company_name: str, 
@@ -122,38 +445,61 @@ class GeminiService:
                 challenge_title=challenge['title'],
                 challenge_description=challenge['description']
             )
+            cache_key = LLMCache.cache_key(self.api_key, self.model.model_name, prompt, company_name)
+            cached = _response_cache.get(cache_key)
+            if cached:
+                return cached
             
-            response = self.model.generate_content(prompt)
-            
-            # Try to extract JSON from the response
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]
-            if response_text.startswith('```'):
-                response_text = response_text[3:]
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
+            response = await self._generate(prompt)
             
             try:
-                result = json.loads(response_text)
-                return result
+                result = _extract_json(response.text)
             except json.JSONDecodeError as json_error:
                 print(f"JSON parsing error for project refinement: {json_error}")
-                print(f"Raw response: {response_text}")
+                print(f"Raw response: {response.text}")
                 # Return original project if parsing fails
                 return project
             
+            if not isinstance(result, dict) or not result.get('title') or not result.get('description'):
+                print(f"Unexpected project refinement response: {response.text}")
+                return project
+            
+            _response_cache.set(cache_key, result)
+            return result
+            
         except Exception as e:
             print(f"Error refining project idea: {e}")
             return project
     
+    def _format_skills(self, user_skills: Optional[List[str]]) -> str:
+        """Describe the user's skills for inclusion in a prompt"""
+        return f"User skills: {', '.join(user_skills)}" if user_skills else "No specific skills mentioned"
+    
+    def _format_context(self, additional_info: Optional[str]) -> str:
+        """Describe any additional company context for inclusion in a prompt"""
+        return f"Additional context about the company:\n{additional_info}" if additional_info else ""
+    
+    def _attach_challenges(
+        self,
+        projects: List[Dict[str, Any]],
+        challenges: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Back-fill challenge id/title from the `challenge_number` tag of each project"""
+        for project in projects:
+            try:
+                index = int(project.get('challenge_number', 0)) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(challenges):
+                challenge = challenges[index]
+                project['challenge_id'] = challenge.get('id', f"challenge_{index}")
+                project['challenge_title'] = challenge['title']
+        return projects
+    
     def _get_default_company_profile(self, company_name: str) -> Dict[str, Any]:
         """Fallback company profile when AI analysis fails"""
         return {
+            "fallback": True,
             "name": company_name,
             "industry": "technology",
             "size": "scaleup",
@@ -182,28 +528,8 @@ class GeminiService:
         }
     
     def _get_default_project_ideas(self, company_name: str, total_ideas: int) -> List[Dict[str, Any]]:
-        """Fallback project ideas when AI generation fails"""
-        default_projects = [
-            {
-                "title": "Real-time Analytics Dashboard",
-                "description": "Build a dashboard to visualize company metrics in real-time",
-                "difficulty": "intermediate",
-                "estimated_duration": "2-3 months",
-                "tech_stack": ["React", "Node.js", "WebSocket", "Chart.js"],
-                "demo_hook": "Demonstrate real-time data updates and interactive charts",
-                "challenge_id": "challenge_1",
-                "challenge_title": "Data Visualization"
-            },
-            {
-                "title": "API Gateway Service",
-                "description": "Create a centralized API gateway for microservices",
-                "difficulty": "advanced",
-                "estimated_duration": "3-4 months",
-                "tech_stack": ["Python", "FastAPI", "Redis", "Docker"],
-                "demo_hook": "Show API routing, rate limiting, and service discovery",
-                "challenge_id": "challenge_2",
-                "challenge_title": "System Architecture"
-            }
+        """Fallback project ideas when AI generation fails, as fresh dicts shaped like a real response"""
+        return [
+            {**project, "tech_stack": list(project["tech_stack"])}
+            for project in _DEFAULT_PROJECT_IDEAS[:total_ideas]
         ]
-        
-        return default_projects[:total_ideas] 
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Exact-match cache for parsed Gemini responses
+"""
+
+import copy
+import hashlib
+import os
+from typing import Any, Optional
+
+from .cache import TTLCache, api_key_digest, canonicalize_prompt
+
+
+class LLMCache:
+    """
+    Cache of parsed Gemini responses keyed by a SHA-256 digest of the API key, model
+    and canonical prompt. Kept in memory by default; given a directory it is stored
+    on disk with diskcache, so entries survive restarts and are shared by workers
+    """
+
+    def __init__(self, maxsize: int, ttl: float, directory: Optional[str] = None):
+        self.ttl = ttl
+        if directory:
+            from diskcache import Cache
+            self._disk = Cache(os.path.expanduser(directory))
+            self._memory = None
+        else:
+            self._disk = None
+            self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def cache_key(api_key: str, model_name: str, prompt: str, company_name: str) -> str:
+        """Hash the key, model and canonical prompt so long prompts don't have to be kept around as keys"""
+        key_material = f"{api_key_digest(api_key)}\n{model_name}\n{canonicalize_prompt(prompt, company_name)}"
+        return hashlib.sha256(key_material.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of a fresh cached response, if there is one"""
+        if self._disk is not None:
+            # diskcache unpickles a fresh copy on every read
+            return self._disk.get(key)
+        cached = self._memory.get(key)
+        return copy.deepcopy(cached) if cached else None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a copy of a parsed response"""
+        if self._disk is not None:
+            self._disk.set(key, value, expire=self.ttl)
+        else:
+            self._memory.set(key, copy.deepcopy(value))
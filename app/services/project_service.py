@@ -2,17 +2,19 @@
 Project generation service for the FastAPI application
 """
 
-import asyncio
-import sys
-import os
+from datetime import datetime
 from typing import List, Optional
 
-# Add the project root to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from app.models.schemas import ProjectIdea, CompanyProfile, EngineeringChallenge
+from ..models.schemas import ProjectIdea, CompanyProfile, EngineeringChallenge
 from .gemini_service import GeminiService
 
+# Fields of each model that are handed to the Gemini prompts
+_CHALLENGE_PROMPT_FIELDS = {'id', 'title', 'description', 'difficulty', 'tech_areas'}
+_PROJECT_PROMPT_FIELDS = {
+    'title', 'description', 'difficulty', 'estimated_duration',
+    'tech_stack', 'demo_hook', 'challenge_id', 'challenge_title'
+}
+
 
 class ProjectGenerationService:
     """Service for generating and refining project ideas"""
@@ -34,29 +36,16 @@ class ProjectGenerationService:
         """
         try:
             # Convert challenges to dict format for Gemini service
-            challenges_data = [
-                {
-                    'title': challenge.title,
-                    'description': challenge.description,
-                    'difficulty': challenge.difficulty,
-                    'tech_areas': challenge.tech_areas
-                }
-                for challenge in challenges
-            ]
+            challenges_data = [challenge.model_dump(include=_CHALLENGE_PROMPT_FIELDS) for challenge in challenges]
             
-            # Run the Gemini service in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            projects_data = await loop.run_in_executor(
-                None, 
-                self.gemini_service.generate_project_ideas,
+            projects_data = await self.gemini_service.generate_project_ideas(
                 company_name,
                 challenges_data,
                 user_skills,
                 total_ideas
             )
             
-            # Convert the raw data to ProjectIdea models
-            return [self._convert_to_project_idea(project_data, company_name) for project_data in projects_data]
+            return self.convert_project_ideas(projects_data, company_name)
             
         except Exception as e:
             print(f"Error generating projects for {company_name}: {e}")
@@ -74,29 +63,10 @@ class ProjectGenerationService:
         """
         try:
             # Convert project and challenge to dict format
-            project_data = {
-                'title': project.title,
-                'description': project.description,
-                'difficulty': project.difficulty,
-                'estimated_duration': project.estimated_duration,
-                'tech_stack': project.tech_stack,
-                'demo_hook': project.demo_hook,
-                'challenge_id': project.challenge_id,
-                'challenge_title': project.challenge_title
-            }
+            project_data = project.model_dump(include=_PROJECT_PROMPT_FIELDS)
+            challenge_data = challenge.model_dump(include=_CHALLENGE_PROMPT_FIELDS - {'id'})
             
-            challenge_data = {
-                'title': challenge.title,
-                'description': challenge.description,
-                'difficulty': challenge.difficulty,
-                'tech_areas': challenge.tech_areas
-            }
-            
-            # Run the Gemini service in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            refined_project_data = await loop.run_in_executor(
-                None, 
-                self.gemini_service.refine_project_idea,
+            refined_project_data = await self.gemini_service.refine_project_idea(
                 project_data,
                 company_name,
                 challenge_data
@@ -126,8 +96,8 @@ class ProjectGenerationService:
             print(f"Error generating variations for {base_project.title}: {e}")
             return []
     
+    @staticmethod
     async def get_project_suggestions(
-        self,
         user_skills: List[str],
         preferred_difficulty: str = "intermediate",
         max_duration: str = "3 months"
@@ -150,16 +120,27 @@ class ProjectGenerationService:
             print(f"Error getting project suggestions: {e}")
             return []
     
-    def _convert_to_project_idea(self, data: dict, company_name: str = "Unknown Company") -> ProjectIdea:
+    def convert_project_ideas(self, projects_data: List[dict], company_name: str) -> List[ProjectIdea]:
+        """Convert raw project data returned by Gemini to ProjectIdea models"""
+        # Ideas from one generation share a single creation timestamp
+        created_at = datetime.now()
+        return [self._convert_to_project_idea(project_data, company_name, created_at) for project_data in projects_data]
+    
+    def _convert_to_project_idea(self, data: dict, company_name: str = "Unknown Company", created_at: Optional[datetime] = None) -> ProjectIdea:
         """Convert raw project data to ProjectIdea model"""
+        tech_stack = data.get('tech_stack', [])
+        if isinstance(tech_stack, str):
+            # Split comma-separated stacks once here so clients always receive a list
+            tech_stack = [tech.strip() for tech in tech_stack.split(',') if tech.strip()]
         return ProjectIdea(
             title=data.get('title', 'Project Title'),
             description=data.get('description', 'Project description'),
-            tech_stack=data.get('tech_stack', []),
+            tech_stack=tech_stack,
             demo_hook=data.get('demo_hook', 'Demonstrate the core functionality and technical implementation'),
             difficulty=data.get('difficulty', 'intermediate'),
             estimated_duration=data.get('estimated_duration', '2-3 months'),
             challenge_id=data.get('challenge_id', 'challenge_1'),
             challenge_title=data.get('challenge_title', 'Challenge Title'),
-            company_name=company_name
+            company_name=company_name,
+            created_at=created_at or datetime.now()
         )
@@ -4,12 +4,16 @@ Prompts module for centralized prompt management
 
 from .prompts import (
     COMPANY_ANALYSIS_PROMPT,
+    COMPANIES_ANALYSIS_PROMPT,
+    COMPANY_PROJECTS_PROMPT,
     PROJECT_GENERATION_PROMPT,
     PROJECT_REFINEMENT_PROMPT
 )
 
 __all__ = [
     'COMPANY_ANALYSIS_PROMPT',
+    'COMPANIES_ANALYSIS_PROMPT',
+    'COMPANY_PROJECTS_PROMPT',
     'PROJECT_GENERATION_PROMPT', 
     'PROJECT_REFINEMENT_PROMPT'
 ] 
\ No newline at end of file
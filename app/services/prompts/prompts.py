@@ -27,15 +27,106 @@ Analyze the company "{company_name}" and provide the following information in JS
     ]
 }}
 
+{context_text}
+
+Important: 
+- Use lowercase for industry (e.g., "technology" not "Technology") and use the exact size values listed above.
+- Return ONLY the JSON object, no markdown formatting, no code blocks, no additional text.
+- Focus on real engineering challenges that this company might face.
+"""
+
+# Multi-Company Analysis Prompt
+COMPANIES_ANALYSIS_PROMPT = """
+Analyze each of these companies:
+{company_names}
+
+Return a single JSON object whose keys are the company names exactly as listed above, each mapping to that company's profile in this format:
+{{
+    "Company name as listed": {{
+        "name": "Company name",
+        "industry": "technology/finance/healthcare/ecommerce/education/entertainment/transportation/real_estate/manufacturing/consulting/other",
+        "size": "startup/scaleup/enterprise/unknown",
+        "description": "Brief company description",
+        "business_focus": "Main business focus and primary revenue stream",
+        "tech_stack": {{
+            "backend": ["tech1", "tech2"],
+            "frontend": ["tech1", "tech2"],
+            "database": ["db1", "db2"],
+            "cloud": ["aws", "gcp", "azure"]
+        }},
+        "engineering_challenges": [
+            {{
+                "title": "Challenge title",
+                "description": "Detailed description",
+                "difficulty": "beginner/intermediate/advanced",
+                "tech_areas": ["area1", "area2"]
+            }}
+        ]
+    }}
+}}
+
+Important: 
+- Use lowercase for industry (e.g., "technology" not "Technology") and use the exact size values listed above.
+- Return ONLY the JSON object, no markdown formatting, no code blocks, no additional text.
+- Include every listed company and focus on real engineering challenges that each one might face.
+"""
+
+# Combined Company Analysis + Project Generation Prompt
+COMPANY_PROJECTS_PROMPT = """
+Analyze the company "{company_name}", identify its engineering challenges, and generate {total_ideas} project ideas based on those challenges.
+
+{context_text}
+
+{skills_text}
+
+Return a single JSON object in this format:
+{{
+    "company": {{
+        "name": "Company name",
+        "industry": "technology/finance/healthcare/ecommerce/education/entertainment/transportation/real_estate/manufacturing/consulting/other",
+        "size": "startup/scaleup/enterprise/unknown",
+        "description": "Brief company description",
+        "business_focus": "Main business focus and primary revenue stream",
+        "tech_stack": {{
+            "backend": ["tech1", "tech2"],
+            "frontend": ["tech1", "tech2"],
+            "database": ["db1", "db2"],
+            "cloud": ["aws", "gcp", "azure"]
+        }},
+        "engineering_challenges": [
+            {{
+                "title": "Challenge title",
+                "description": "Detailed description",
+                "difficulty": "beginner/intermediate/advanced",
+                "tech_areas": ["area1", "area2"]
+            }}
+        ]
+    }},
+    "projects": [
+        {{
+            "title": "Project title",
+            "description": "Detailed project description",
+            "difficulty": "beginner/intermediate/advanced",
+            "estimated_duration": "2-3 months",
+            "tech_stack": ["tech1", "tech2"],
+            "demo_hook": "What to demonstrate in interview",
+            "challenge_number": 1
+        }}
+    ]
+}}
+
 Important: 
 - Use lowercase for industry (e.g., "technology" not "Technology") and use the exact size values listed above.
 - Return ONLY the JSON object, no markdown formatting, no code blocks, no additional text.
 - Focus on real engineering challenges that this company might face.
+- Set each project's "challenge_number" to the 1-based position of the challenge it addresses in "engineering_challenges".
+- Spread the projects evenly across all of the challenges.
+Make projects practical and achievable.
 """
 
 # Project Generation Prompt
 PROJECT_GENERATION_PROMPT = """
-Generate {total_ideas} project ideas for {company_name} based on these engineering challenges:
+Generate {total_ideas} project ideas for {company_name} based on these numbered engineering challenges:
 
 {challenges_text}
 
@@ -50,12 +141,13 @@ Return as JSON array:
         "estimated_duration": "2-3 months",
         "tech_stack": ["tech1", "tech2"],
         "demo_hook": "What to demonstrate in interview",
-        "challenge_id": "challenge_1",
-        "challenge_title": "Original challenge title"
+        "challenge_number": 1
     }}
 ]
 
 Important: Return ONLY the JSON array, no markdown formatting, no code blocks, no additional text.
+- Set "challenge_number" to the [number] of the challenge each project addresses.
+- Spread the projects evenly across all of the challenges.
 Make projects practical and achievable.
 """
 
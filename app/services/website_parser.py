@@ -1,20 +1,62 @@
 import os
+import atexit
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, urldefrag
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import time
-from tempfile import NamedTemporaryFile
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
 import spacy
 import re
-from google import genai
+import threading
+import math
+import requests
+from google.ai import generativelanguage as glm
+from ..core.config import settings
+from .cache import TTLCache
 
 nlp = spacy.blank("en")  # Lightweight, just for sentence splitting
 nlp.add_pipe('sentencizer')
 
+# Summaries keyed by (normalized URL, crawl options). Crawls run in worker threads, hence the lock
+_summary_cache = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL)
+_summary_cache_lock = threading.Lock()
+
+# Pages are fetched over plain HTTP first; the browser is only started for pages whose
+# text is rendered client-side, i.e. whose served HTML has less visible text than this
+_MIN_STATIC_TEXT_CHARS = 200
+# Statuses bot walls tend to answer plain HTTP clients with; these pages are retried in the browser
+_BROWSER_RETRY_STATUSES = (403, 429)
+# Only HTML is summarized, and no more of it than this is downloaded per page
+_HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+_MAX_PAGE_BYTES = 2 * 1024 * 1024
+# requests.Session is not thread-safe, so each fetch thread keeps its own
+_thread_local = threading.local()
+
+# Pages at the same crawl depth are fetched concurrently on this pool
+_fetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="crawl")
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_BOILERPLATE_RE = re.compile(r'cookie|privacy|terms|contact|login|signup', re.IGNORECASE)
+_CONTENT_CLASS_RE = re.compile(r'content|main|body')
+
+# One headless Chrome shared by every crawl, started the first time a page needs rendering.
+# A WebDriver can only drive one page at a time, so crawl threads take turns under the lock
+_driver = None
+_driver_lock = threading.Lock()
+# Seconds a page may take to load, and a crawl may wait for the browser, before it is skipped
+_PAGE_LOAD_TIMEOUT = 15
+_DRIVER_WAIT_TIMEOUT = 30
+
+# Text shorter than this is used as-is rather than summarized
+_MIN_SUMMARY_CHARS = 200
+
+# Gemini averages about four characters of English text per token
+_CHARS_PER_TOKEN = 4
+
 def normalize_url(url):
     url = urldefrag(url)[0]
     parsed = urlparse(url)
@@ -25,22 +67,113 @@ def clean_and_truncate_text(text, max_chars=2000):
     Clean and truncate text to reduce token usage.
     """
     # Remove extra whitespace and normalize
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WHITESPACE_RE.sub(' ', text.strip())
     # Remove common web artifacts
-    text = re.sub(r'cookie|privacy|terms|contact|login|signup', '', text, flags=re.IGNORECASE)
+    text = _BOILERPLATE_RE.sub('', text)
     # Truncate to max_chars, preferably at sentence boundary
     if len(text) > max_chars:
         sentences = text.split('.')
-        truncated = ''
+        # Collect pieces and track the running length rather than re-concatenating the prefix
+        parts = []
+        length = 0
         for sentence in sentences:
-            if len(truncated + sentence + '.') <= max_chars:
-                truncated += sentence + '.'
-            else:
+            length += len(sentence) + 1
+            if length > max_chars:
                 break
-        return truncated.strip()
+            parts.append(sentence)
+            parts.append('.')
+        return ''.join(parts).strip()
     return text
 
-def crawl_and_summarize_website(start_url, max_depth=1, max_chars=5000, summary_sentences=5):
+def _get_http_session():
+    session = getattr(_thread_local, 'http_session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({"User-Agent": "Mozilla/5.0 (compatible; ProjectFinder/2.0)"})
+        _thread_local.http_session = session
+    return session
+
+def _fetch_html(url):
+    """
+    Fetch url over plain HTTP. Returns (is_html, soup): is_html is False for
+    non-HTML responses such as PDFs or archives, which should not be crawled at all.
+    """
+    with _get_http_session().get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in _HTML_CONTENT_TYPES:
+            return False, None
+        # Read at most _MAX_PAGE_BYTES; a huge page is parsed from its first part only
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body.extend(chunk)
+            if len(body) >= _MAX_PAGE_BYTES:
+                del body[_MAX_PAGE_BYTES:]
+                break
+        # Trust the charset only when the server sent one; otherwise let the parser sniff it
+        encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+    return True, BeautifulSoup(bytes(body), 'lxml', from_encoding=encoding)
+
+def _quit_driver():
+    global _driver
+    if _driver is not None:
+        try:
+            _driver.quit()
+        except Exception:
+            pass
+        _driver = None
+
+atexit.register(_quit_driver)
+
+def _render_page(url):
+    """
+    Load url in the shared headless browser and return the rendered HTML,
+    or None when the browser stays busy with other crawls for too long.
+    """
+    global _driver
+    if not _driver_lock.acquire(timeout=_DRIVER_WAIT_TIMEOUT):
+        return None
+    try:
+        if _driver is None:
+            # --- Setup Headless Chrome ---
+            options = Options()
+            options.add_argument("--headless=new")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-dev-shm-usage")
+            options.add_argument("--log-level=3")
+            options.add_argument("--window-size=1920,1080")
+            _driver = webdriver.Chrome(options=options)
+            _driver.set_page_load_timeout(_PAGE_LOAD_TIMEOUT)
+        try:
+            _driver.get(url)
+            time.sleep(1)  # Reduced wait time
+            return _driver.page_source
+        except Exception as e:
+            # A page-load timeout leaves the browser usable; anything else may mean it crashed
+            if not isinstance(e, TimeoutException):
+                _quit_driver()
+            raise
+    finally:
+        _driver_lock.release()
+
+def crawl_and_summarize_website(start_url, max_depth=1, max_chars=5000, summary_sentences=5, max_pages=3):
+    """
+    Crawl the website starting from start_url, extract text, and return a concise summary.
+    Summaries are cached per URL, so the token preview and the analysis that follows share one crawl.
+    """
+    cache_key = (normalize_url(start_url), max_depth, max_chars, summary_sentences, max_pages)
+    with _summary_cache_lock:
+        cached = _summary_cache.get(cache_key)
+    if cached:
+        return cached
+    summary = _crawl_and_summarize_website(start_url, max_depth, max_chars, summary_sentences, max_pages)
+    if summary:
+        with _summary_cache_lock:
+            _summary_cache.set(cache_key, summary)
+    return summary
+
+def _crawl_and_summarize_website(start_url, max_depth, max_chars, summary_sentences, max_pages):
     """
     Crawl the website starting from start_url, extract text, and return a concise summary.
     Optimized for token efficiency.
@@ -48,51 +181,76 @@ def crawl_and_summarize_website(start_url, max_depth=1, max_chars=5000, summary_
     visited = set()
     domain = urlparse(start_url).netloc
     all_text = []
+    total_chars = 0  # length of ' '.join(all_text), kept up to date as pages are added
 
-    # --- Setup Headless Chrome ---
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--log-level=3")
-    options.add_argument("--window-size=1920,1080")
-    driver = webdriver.Chrome(options=options)
-
-    def extract_text(url, depth=0):
-        if depth > max_depth or len(' '.join(all_text)) > max_chars:
-            return
+    def load_page(url):
+        soup = None
         try:
-            driver.get(url)
-            time.sleep(1)  # Reduced wait time
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            # Extract only main content areas
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main|body'))
-            if main_content:
-                texts = list(main_content.stripped_strings)
-            else:
-                texts = list(soup.stripped_strings)
-            page_text = ' '.join(texts)
-            if page_text:
-                all_text.append(page_text)
-            # Limit crawling to avoid excessive content
-            if len(all_text) >= 3:  # Only crawl first 3 pages
-                return
-            for link in soup.find_all('a', href=True):
-                abs_url = normalize_url(urljoin(url, link['href']))
-                if abs_url not in visited and domain in abs_url:
-                    visited.add(abs_url)
-                    extract_text(abs_url, depth + 1)
-        except Exception:
-            pass
+            is_html, soup = _fetch_html(url)
+            if not is_html:
+                return None
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in _BROWSER_RETRY_STATUSES:
+                return None
+        except requests.RequestException:
+            # Dead links and unreachable hosts won't load in the browser either
+            return None
+        if soup is None or len(soup.get_text(strip=True)) < _MIN_STATIC_TEXT_CHARS:
+            # Too little server-rendered text, so render the page in the browser.
+            # If the browser is busy or the page too slow, keep whatever static HTML there is
+            try:
+                html = _render_page(url)
+            except TimeoutException:
+                html = None
+            if html is not None:
+                soup = BeautifulSoup(html, 'lxml')
+        return soup
+
+    def extract_text(soup):
+        # Remove script and style elements
+        for script in soup(["script", "style", "nav", "footer", "header"]):
+            script.decompose()
+        # Extract only main content areas
+        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=_CONTENT_CLASS_RE)
+        if main_content:
+            texts = list(main_content.stripped_strings)
+        else:
+            texts = list(soup.stripped_strings)
+        return ' '.join(texts)
+
+    def fetch_page(url):
+        soup = load_page(url)
+        if soup is None:
+            return '', []
+        page_text = extract_text(soup)
+        links = [normalize_url(urljoin(url, link['href'])) for link in soup.find_all('a', href=True)]
+        return page_text, links
 
+    # Breadth-first, so the start page's own links are visited before anything deeper
     normalized_start = normalize_url(start_url)
     visited.add(normalized_start)
-    extract_text(normalized_start)
-    driver.quit()
+    queue = deque([(normalized_start, 0)])
+    pages_fetched = 0
+    # Limit crawling to avoid excessive content
+    while queue and pages_fetched < max_pages and total_chars <= max_chars:
+        # Fetch as many queued pages as the page budget allows at once; results are
+        # consumed in queue order so the crawl visits the same pages as a serial one
+        batch = [queue.popleft() for _ in range(min(len(queue), max_pages - pages_fetched))]
+        pages_fetched += len(batch)
+        futures = [(depth, _fetch_executor.submit(fetch_page, url)) for url, depth in batch]
+        for depth, future in futures:
+            try:
+                page_text, links = future.result()
+            except Exception:
+                continue
+            if page_text:
+                total_chars += len(page_text) + (1 if all_text else 0)
+                all_text.append(page_text)
+            if depth < max_depth:
+                for abs_url in links:
+                    if abs_url not in visited and domain in abs_url:
+                        visited.add(abs_url)
+                        queue.append((abs_url, depth + 1))
 
     full_text = ' '.join(all_text)
     if not full_text.strip():
@@ -100,6 +258,8 @@ def crawl_and_summarize_website(start_url, max_depth=1, max_chars=5000, summary_
 
     # Clean and truncate the text
     cleaned_text = clean_and_truncate_text(full_text, max_chars=2000)
+    if len(cleaned_text) < _MIN_SUMMARY_CHARS:
+        return cleaned_text
 
     # Use spaCy for efficient summarization
     try:
@@ -112,24 +272,33 @@ def crawl_and_summarize_website(start_url, max_depth=1, max_chars=5000, summary_
         # Fallback: return first 2000 characters
         return cleaned_text[:2000]
 
-def preview_gemini_token_count(prompt, api_key=None, model="gemini-2.5-flash-lite-preview-06-17"):
+@lru_cache(maxsize=128)
+def _get_token_client(api_key):
+    """
+    One token-counting client (and gRPC channel) per API key, reused across previews.
+    Each is keyed on its own, so the SDK's global configuration is left untouched.
+    """
+    return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+def preview_gemini_token_count(prompt, api_key=None, exact=False):
     """
-    Returns the number of tokens that would be sent to Gemini for a given prompt.
+    Returns the number of tokens that would be sent to the configured Gemini model for a given prompt.
+    By default this is a local estimate; exact=True (with an API key) asks the Gemini API instead.
     """
-    if api_key:
-        genai.configure(api_key=api_key)
-    client = genai.Client()
-    total_tokens = client.models.count_tokens(
-        model=model, contents=prompt
+    if not exact or not api_key:
+        return math.ceil(len(prompt) / _CHARS_PER_TOKEN)
+    response = _get_token_client(api_key).count_tokens(
+        model=f"models/{settings.GEMINI_MODEL}",
+        contents=[glm.Content(parts=[glm.Part(text=prompt)])]
     )
-    return total_tokens
+    return response.total_tokens
 
-def crawl_summarize_and_preview_tokens(start_url, api_key=None, max_depth=1, max_chars=5000, summary_sentences=5, model="gemini-2.5-flash-lite-preview-06-17"):
+def crawl_summarize_and_preview_tokens(start_url, api_key=None, max_depth=1, max_chars=5000, summary_sentences=5, exact=False):
     """
     Crawl and summarize the website, and return both the summary and the Gemini token count preview.
     """
     summary = crawl_and_summarize_website(start_url, max_depth=max_depth, max_chars=max_chars, summary_sentences=summary_sentences)
     if not summary:
         return {"summary": None, "token_count": 0}
-    token_count = preview_gemini_token_count(summary, api_key=api_key, model=model)
-    return {"summary": summary, "token_count": token_count} 
\ No newline at end of file
+    token_count = preview_gemini_token_count(summary, api_key=api_key, exact=exact)
+    return {"summary": summary, "token_count": token_count}
@@ -11,6 +11,7 @@ class ProjectFinder {
     init() {
         this.setupEventListeners();
         this.loadApiKey();
+        this.loadProjects();
     }
 
     setupEventListeners() {
@@ -37,6 +38,26 @@ class ProjectFinder {
         }
     }
 
+    loadProjects() {
+        // Restore ideas from the previous visit so a reload doesn't require regenerating them
+        const savedProjects = localStorage.getItem('project_ideas');
+        if (!savedProjects) return;
+
+        try {
+            this.projects = JSON.parse(savedProjects);
+        } catch (err) {
+            localStorage.removeItem('project_ideas');
+            return;
+        }
+        if (this.projects.length > 0) {
+            this.displayProjects(false);
+        }
+    }
+
+    saveProjects() {
+        localStorage.setItem('project_ideas', JSON.stringify(this.projects));
+    }
+
     setApiKey() {
         const apiKeyInput = document.getElementById('apiKey');
         const apiKey = apiKeyInput.value.trim();
@@ -146,6 +167,7 @@ class ProjectFinder {
             this.updateLoadingProgress(90, 'Finalizing results...');
 
             this.projects = data.project_ideas || [];
+            this.saveProjects();
             this.updateLoadingProgress(100, 'Complete!');
 
             setTimeout(() => {
@@ -207,7 +229,7 @@ class ProjectFinder {
         document.querySelector('.loading-description').textContent = message;
     }
 
-    displayProjects() {
+    displayProjects(scroll = true) {
         if (this.projects.length === 0) {
             document.getElementById('projects').innerHTML = '<p>No projects generated.</p>';
             return;
@@ -220,17 +242,17 @@ class ProjectFinder {
         // Update stats
         this.updateStats();
 
-        // Generate projects HTML
-        const projectsGrid = document.getElementById('projectsGrid');
-        projectsGrid.innerHTML = '';
-
+        // Build all cards off-document and insert them with a single DOM write
+        const fragment = document.createDocumentFragment();
         this.projects.forEach((project, index) => {
-            const projectCard = this.createProjectCard(project, index);
-            projectsGrid.appendChild(projectCard);
+            fragment.appendChild(this.createProjectCard(project, index));
         });
+        document.getElementById('projectsGrid').replaceChildren(fragment);
 
         // Scroll to projects section
-        this.scrollToElement('projects');
+        if (scroll) {
+            this.scrollToElement('projects');
+        }
     }
 
     createProjectCard(project, index) {
@@ -238,7 +260,8 @@ class ProjectFinder {
         card.className = 'project-card fade-in';
         card.style.animationDelay = `${index * 0.1}s`;
 
-        const techStackHtml = project.tech_stack.map(tech => 
+        // Empty tech stacks are left out of API responses
+        const techStackHtml = (project.tech_stack || []).map(tech => 
             `<span class="tech-stack">${tech}</span>`
         ).join('');
 
@@ -284,17 +307,24 @@ class ProjectFinder {
     }
 
     updateStats() {
-        const totalProjects = this.projects.length;
-        const companiesAnalyzed = new Set(this.projects.map(p => p.company_name)).size;
-        const uniqueTechs = new Set(this.projects.flatMap(p => p.tech_stack)).size;
+        // Collect companies and technologies in a single pass over the projects
+        const companies = new Set();
+        const techs = new Set();
+        for (const project of this.projects) {
+            companies.add(project.company_name);
+            for (const tech of project.tech_stack || []) {
+                techs.add(tech);
+            }
+        }
 
-        document.getElementById('totalProjects').textContent = totalProjects;
-        document.getElementById('companiesAnalyzed').textContent = companiesAnalyzed;
-        document.getElementById('technologiesSuggested').textContent = uniqueTechs;
+        document.getElementById('totalProjects').textContent = this.projects.length;
+        document.getElementById('companiesAnalyzed').textContent = companies.size;
+        document.getElementById('technologiesSuggested').textContent = techs.size;
     }
 
     clearAll() {
         this.projects = [];
+        localStorage.removeItem('project_ideas');
         document.getElementById('projectsGrid').innerHTML = '';
         document.querySelector('.projects-header').classList.add('d-none');
         document.querySelector('.stats-section').classList.add('d-none');
@@ -319,15 +349,22 @@ class ProjectFinder {
             projects: this.projects
         };
 
-        const dataStr = JSON.stringify(exportData, null, 2);
-        const dataUri = 'data:application/json;charset=utf-8,'+ encodeURIComponent(dataStr);
-        
+        // Hand the JSON to the browser as a Blob instead of percent-encoding a second copy into a data URI
+        const blob = new Blob([JSON.stringify(exportData, null, 2)], { type: 'application/json' });
+        const blobUrl = URL.createObjectURL(blob);
+
         const exportFileDefaultName = `project_ideas_${new Date().toISOString().split('T')[0]}.json`;
-        
+
         const linkElement = document.createElement('a');
-        linkElement.setAttribute('href', dataUri);
+        linkElement.setAttribute('href', blobUrl);
         linkElement.setAttribute('download', exportFileDefaultName);
+        // Firefox and Safari only download from links that are in the document
+        linkElement.style.display = 'none';
+        document.body.appendChild(linkElement);
         linkElement.click();
+        linkElement.remove();
+        // Revoking too early can abort the download, so keep the URL alive for a while (as FileSaver.js does)
+        setTimeout(() => URL.revokeObjectURL(blobUrl), 40000);
         
         this.showNotification('Projects exported successfully!', 'success');
     }